@@ -1,6 +1,9 @@
 """
 Cropping algorithms for invoice content detection
 """
+import os
+from collections import OrderedDict
+from dataclasses import astuple
 import fitz
 import numpy as np
 from typing import Optional
@@ -11,10 +14,59 @@ from .pdf_engine import PDFEngine
 class Cropper:
     """Handles automatic and manual cropping of invoice PDFs"""
 
-    def __init__(self, config: CropConfig = None):
-        """Initialize cropper with configuration"""
+    # Maximum number of auto-crop rects kept in the (possibly shared) cache
+    auto_rect_cache_size: int = 1024
+
+    def __init__(
+        self,
+        config: CropConfig = None,
+        auto_rect_cache: Optional["OrderedDict[tuple, fitz.Rect]"] = None
+    ):
+        """
+        Initialize cropper with configuration
+
+        Args:
+            config: Crop configuration
+            auto_rect_cache: Optional shared LRU of auto-crop rects keyed by
+                auto_rect_key, so items pointing at the same page reuse it
+        """
         self.config = config or CropConfig()
         self.engine = PDFEngine()
+        self.auto_rect_cache = auto_rect_cache if auto_rect_cache is not None else OrderedDict()
+
+    def auto_rect_key(self, path: str, page_index: int) -> Optional[tuple]:
+        """
+        Build the auto-rect cache key for a page
+
+        The key includes the file's mtime and the detection settings, so a
+        re-saved file or a different configuration never reuses a stale rect.
+
+        Args:
+            path: Path to PDF file
+            page_index: Page index
+
+        Returns:
+            Cache key, or None if the file cannot be stat'ed
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        return (path, mtime, page_index, astuple(self.config))
+
+    def lookup_auto_rect(self, key: tuple) -> Optional[fitz.Rect]:
+        """Get a cached auto-crop rect and mark it as recently used"""
+        rect = self.auto_rect_cache.get(key)
+        if rect is not None:
+            self.auto_rect_cache.move_to_end(key)
+        return rect
+
+    def store_auto_rect(self, key: tuple, rect: fitz.Rect):
+        """Cache an auto-crop rect, evicting the least recently used ones"""
+        self.auto_rect_cache[key] = rect
+        self.auto_rect_cache.move_to_end(key)
+        while len(self.auto_rect_cache) > self.auto_rect_cache_size:
+            self.auto_rect_cache.popitem(last=False)
 
     def compute_crop_rect(
         self,
@@ -34,29 +86,43 @@ class Cropper:
             Crop rectangle in page coordinates
         """
         page = self.engine.get_page(doc, page_index)
+        page_rect = page.rect  # fetched once; each access crosses into MuPDF
 
         if item.crop_mode == "manual" and item.manual_norm:
-            return self._manual_crop(page, item.manual_norm)
+            return self._manual_crop(page_rect, item.manual_norm)
         elif item.crop_mode == "top":
-            return self._top_half_crop(page)
+            return self._top_half_crop(page_rect)
         else:  # auto
-            return self._auto_crop(page)
+            return self._cached_auto_crop(page, page_rect, item)
 
-    def _manual_crop(self, page: fitz.Page, norm_coords: tuple) -> fitz.Rect:
+    def _cached_auto_crop(
+        self,
+        page: fitz.Page,
+        page_rect: fitz.Rect,
+        item: InvoiceItem
+    ) -> fitz.Rect:
+        """Return auto-crop rect, detecting at most once per file version and page"""
+        key = self.auto_rect_key(item.path, item.page_index)
+        if key is None or item.cached_auto_rect is None or item.cached_auto_key != key:
+            rect = self.lookup_auto_rect(key) if key is not None else None
+            if rect is None:
+                rect = self._auto_crop(page, page_rect)
+                if key is not None:
+                    self.store_auto_rect(key, rect)
+            item.cached_auto_rect = rect
+            item.cached_auto_key = key
+        return item.cached_auto_rect & page_rect
+
+    def _manual_crop(self, page_rect: fitz.Rect, norm_coords: tuple) -> fitz.Rect:
         """Convert normalized coordinates to page rect"""
         x0, y0, x1, y1 = norm_coords
-        page_rect = page.rect
-        rect = fitz.Rect(
-            x0 * page_rect.width,
-            y0 * page_rect.height,
-            x1 * page_rect.width,
-            y1 * page_rect.height
-        )
+        width = page_rect.width
+        height = page_rect.height
+        rect = fitz.Rect(x0 * width, y0 * height, x1 * width, y1 * height)
         return rect & page_rect  # Clamp to page bounds
 
-    def _top_half_crop(self, page: fitz.Page) -> fitz.Rect:
+    def _top_half_crop(self, page_rect: fitz.Rect) -> fitz.Rect:
         """Crop to top half of page"""
-        page_rect = page.rect
         return fitz.Rect(
             0,
             0,
@@ -64,90 +130,112 @@ class Cropper:
             page_rect.height * self.config.top_half_ratio
         )
 
-    def _auto_crop(self, page: fitz.Page) -> fitz.Rect:
+    def _auto_crop(self, page: fitz.Page, page_rect: fitz.Rect) -> fitz.Rect:
         """Automatically detect content boundaries"""
+        page_area = page_rect.width * page_rect.height
+
         # Try object-based detection first
-        rect = self._detect_object_bounds(page)
+        rect = self._detect_object_bounds(page, page_rect)
+        rect_area = (rect.x1 - rect.x0) * (rect.y1 - rect.y0)
 
-        # If failed, try pixel-based detection
-        if rect.is_empty or rect.get_area() < 100:
+        # If failed or implausibly small for this page, try pixel-based detection
+        if rect.is_empty or rect_area < page_area * self.config.min_content_ratio:
             rect = self._detect_pixel_bounds(page)
 
-        # If still failed, return full page
-        if rect.is_empty:
-            return page.rect
+            # If still failed, return full page
+            if rect.is_empty:
+                return fitz.Rect(page_rect)
+            rect_area = (rect.x1 - rect.x0) * (rect.y1 - rect.y0)
+
+        # Content spans nearly the whole page; keep all of it
+        if rect_area > page_area * self.config.full_page_ratio:
+            return fitz.Rect(page_rect)
 
         # Add margin and clamp to page
         rect = self._expand_rect(rect, self.config.auto_margin)
-        return rect & page.rect
+        return rect & page_rect
 
-    def _detect_object_bounds(self, page: fitz.Page) -> fitz.Rect:
+    def _detect_object_bounds(self, page: fitz.Page, page_rect: fitz.Rect) -> fitz.Rect:
         """Detect content bounds using PDF objects (text, drawings, images)"""
-        rects = []
+        coords = []  # (x0, y0, x1, y1) of every collected object
 
         # Collect text blocks
         try:
             blocks = self.engine.get_text_blocks(page)
-            for block in blocks:
-                if len(block) >= 4:
-                    rects.append(fitz.Rect(block[:4]))
+            coords.extend(block[:4] for block in blocks)
         except Exception:
             pass
 
+        # Drawings and images can only grow the union, so once text alone
+        # spans enough of the page for _auto_crop to keep the full page,
+        # their traversals cannot change the result
+        text_rect = self._union_coords(coords)
+        if not text_rect.is_empty and \
+                text_rect.get_area() > page_rect.get_area() * self.config.full_page_ratio:
+            return text_rect
+
         # Collect drawings
         try:
             drawings = self.engine.get_drawings(page)
-            for drawing in drawings:
-                if "rect" in drawing:
-                    rects.append(drawing["rect"])
+            coords.extend(tuple(d["rect"]) for d in drawings if "rect" in d)
         except Exception:
             pass
 
         # Collect images
         try:
             images = self.engine.get_images(page)
+            get_image_bbox = self.engine.get_image_bbox
             for img in images:
                 xref = img[0]
-                bbox = self.engine.get_image_bbox(page, xref)
-                if not bbox.is_empty:
-                    rects.append(bbox)
+                coords.append(tuple(get_image_bbox(page, xref)))
         except Exception:
             pass
 
-        # Union all rects
-        if not rects:
-            return fitz.Rect()
+        return self._union_coords(coords)
 
-        result = rects[0]
-        for rect in rects[1:]:
-            result |= rect
-        return result
+    @staticmethod
+    def _union_coords(coords: list) -> fitz.Rect:
+        """Union (x0, y0, x1, y1) tuples in one min/max reduction, ignoring empty rects"""
+        if not coords:
+            return fitz.Rect()
+        arr = np.asarray(coords, dtype=np.float64)
+        arr = arr[(arr[:, 0] < arr[:, 2]) & (arr[:, 1] < arr[:, 3])]
+        if not len(arr):
+            return fitz.Rect()
+        return fitz.Rect(
+            float(arr[:, 0].min()),
+            float(arr[:, 1].min()),
+            float(arr[:, 2].max()),
+            float(arr[:, 3].max())
+        )
 
     def _detect_pixel_bounds(self, page: fitz.Page) -> fitz.Rect:
         """Detect content bounds using pixel analysis (for scanned PDFs)"""
         try:
-            # Render page at moderate resolution
-            mat = fitz.Matrix(self.config.pixel_zoom, self.config.pixel_zoom)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-
-            # Convert to numpy array and grayscale
-            img_array = np.frombuffer(pix.samples, dtype=np.uint8)
-            img_array = img_array.reshape(pix.height, pix.width, 3)
-            gray = np.mean(img_array, axis=2).astype(np.uint8)
+            # Render page at low resolution straight to 8-bit grayscale;
+            # a bounding box needs neither colour nor fine detail
+            zoom = self.config.pixel_zoom
+            mat = fitz.Matrix(zoom, zoom)
+            pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
 
             # Threshold to find content
+            gray = np.frombuffer(pix.samples, dtype=np.uint8)
+            gray = gray.reshape(pix.height, pix.width)
             mask = gray < self.config.pixel_threshold
-            if not mask.any():
-                return fitz.Rect()
 
-            # Find bounding box of content
-            rows = np.any(mask, axis=1)
-            cols = np.any(mask, axis=0)
-            y_min, y_max = np.where(rows)[0][[0, -1]]
-            x_min, x_max = np.where(cols)[0][[0, -1]]
+            # Find bounding box of content (first/last True without index arrays);
+            # the row reduction doubles as the emptiness check, and columns are
+            # only scanned within the content rows
+            rows = mask.any(axis=1)
+            y_min = np.argmax(rows)
+            if not rows[y_min]:
+                return fitz.Rect()
+            y_max = len(rows) - 1 - np.argmax(rows[::-1])
+            cols = mask[y_min:y_max + 1].any(axis=0)
+            x_min = np.argmax(cols)
+            x_max = len(cols) - 1 - np.argmax(cols[::-1])
 
             # Convert back to page coordinates
-            zoom = self.config.pixel_zoom
             rect = fitz.Rect(
                 x_min / zoom,
                 y_min / zoom,
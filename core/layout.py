@@ -2,6 +2,7 @@
 Grid layout calculator for invoice merging
 """
 import fitz
+import numpy as np
 from typing import Tuple, List
 from .models import LayoutConfig
 
@@ -12,6 +13,28 @@ class LayoutCalculator:
     def __init__(self, config: LayoutConfig):
         """Initialize with layout configuration"""
         self.config = config
+        self._precompute_cells()
+
+    def _precompute_cells(self):
+        """Precompute cell size and top-left origin of every cell in the grid"""
+        self._cell_w, self._cell_h = self.get_cell_size()
+        margin = self.config.margin
+        gap = self.config.gap
+        self._cell_origins: List[Tuple[float, float]] = [
+            self._cell_origin(index, margin, gap)
+            for index in range(self.items_per_page())
+        ]
+        # Same origins as separate x/y arrays for batch computation
+        self._cell_x = np.array([x for x, _ in self._cell_origins], dtype=np.float64)
+        self._cell_y = np.array([y for _, y in self._cell_origins], dtype=np.float64)
+
+    def _cell_origin(self, index: int, margin: float, gap: float) -> Tuple[float, float]:
+        """Get top-left position of the cell at a grid index"""
+        row, col = self.get_cell_position(index)
+        return (
+            margin + col * (self._cell_w + gap),
+            margin + row * (self._cell_h + gap)
+        )
 
     def get_cell_size(self) -> Tuple[float, float]:
         """
@@ -76,21 +99,19 @@ class LayoutCalculator:
         Returns:
             Destination rectangle on output page
         """
-        row, col = self.get_cell_position(index)
-        cell_w, cell_h = self.get_cell_size()
-        scale = self.calculate_scale(src_rect)
+        cell_x, cell_y = self._cell_origins[index % len(self._cell_origins)]
+        cell_w = self._cell_w
+        cell_h = self._cell_h
 
         # Calculate scaled dimensions
-        scaled_w = src_rect.width * scale
-        scaled_h = src_rect.height * scale
-
-        # Calculate cell top-left position
-        page_w, page_h = self.config.page_size
-        margin = self.config.margin
-        gap = self.config.gap
-
-        cell_x = margin + col * (cell_w + gap)
-        cell_y = margin + row * (cell_h + gap)
+        src_w = src_rect.width
+        src_h = src_rect.height
+        if src_w <= 0 or src_h <= 0:
+            scale = 1.0
+        else:
+            scale = min(cell_w / src_w, cell_h / src_h)
+        scaled_w = src_w * scale
+        scaled_h = src_h * scale
 
         # Center content in cell
         x0 = cell_x + (cell_w - scaled_w) / 2
@@ -100,6 +121,38 @@ class LayoutCalculator:
 
         return fitz.Rect(x0, y0, x1, y1)
 
+    def batch_dest_rects(self, src_rects: np.ndarray, start_index: int = 0) -> np.ndarray:
+        """
+        Calculate destination rectangles for many source rects at once
+
+        Args:
+            src_rects: (N, 4) array of source rects as x0, y0, x1, y1
+            start_index: Grid index of the first rect; row i goes to
+                cell (start_index + i) modulo items per page
+
+        Returns:
+            (N, 4) array of destination rects on output pages
+        """
+        src_rects = np.asarray(src_rects, dtype=np.float64).reshape(-1, 4)
+        cells = (start_index + np.arange(len(src_rects))) % len(self._cell_origins)
+
+        src_w = src_rects[:, 2] - src_rects[:, 0]
+        src_h = src_rects[:, 3] - src_rects[:, 1]
+        valid = (src_w > 0) & (src_h > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.minimum(self._cell_w / src_w, self._cell_h / src_h)
+        scale = np.where(valid, scale, 1.0)
+        scaled_w = src_w * scale
+        scaled_h = src_h * scale
+
+        # Center content in cell
+        dest = np.empty_like(src_rects)
+        dest[:, 0] = self._cell_x[cells] + (self._cell_w - scaled_w) / 2
+        dest[:, 1] = self._cell_y[cells] + (self._cell_h - scaled_h) / 2
+        dest[:, 2] = dest[:, 0] + scaled_w
+        dest[:, 3] = dest[:, 1] + scaled_h
+        return dest
+
     def items_per_page(self) -> int:
         """Get number of items that fit on one page"""
         return self.config.rows * self.config.cols
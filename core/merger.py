@@ -1,25 +1,142 @@
 """
 Merge export logic for combining invoices into PDF
 """
+import os
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import fitz
-from typing import List, Callable
-from pathlib import Path
-from .models import InvoiceItem, LayoutConfig, ExportProgress
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from .models import CropConfig, InvoiceItem, LayoutConfig, ExportProgress
 from .pdf_engine import PDFEngine
 from .cropper import Cropper
 from .layout import LayoutCalculator
 
 
+def _detect_auto_rects(
+    path: str,
+    page_indices: List[int],
+    crop_config: CropConfig
+) -> List[Tuple[int, Tuple[float, float, float, float]]]:
+    """
+    Detect auto-crop rects for pages of one document (worker process entry)
+
+    Args:
+        path: Path to PDF file
+        page_indices: Page indices to detect
+        crop_config: Crop configuration
+
+    Returns:
+        List of (page_index, rect coordinates) for pages detected successfully
+    """
+    cropper = Cropper(crop_config)
+    try:
+        doc = cropper.engine.open_document(path)
+    except Exception:
+        return []
+
+    results = []
+    try:
+        for page_index in page_indices:
+            item = InvoiceItem(path=path, page_index=page_index)
+            try:
+                rect = cropper.compute_crop_rect(doc, page_index, item)
+            except Exception:
+                continue
+            results.append((page_index, tuple(rect)))
+    finally:
+        doc.close()
+    return results
+
+
 class MergeExporter:
     """Handles merging invoices into a single PDF"""
 
+    # Auto-crop rects shared by all exporters, keyed by Cropper.auto_rect_key
+    auto_rect_cache: "OrderedDict[tuple, fitz.Rect]" = OrderedDict()
+
+    # Minimum number of undetected pages before detection is farmed out to
+    # worker processes. Spawning the pool costs on the order of 1-2 s, while
+    # serial detection takes ~0.5 ms per vector page and ~18 ms per scanned
+    # A4 page, so the pool only pays off for exports of several hundred pages
+    parallel_min_pages: int = 500
+
     def __init__(self, layout_config: LayoutConfig):
         """Initialize exporter with layout configuration"""
         self.layout_config = layout_config
         self.engine = PDFEngine()
-        self.cropper = Cropper()
+        self.cropper = Cropper(auto_rect_cache=MergeExporter.auto_rect_cache)
         self.layout = LayoutCalculator(layout_config)
 
+    def precompute_auto_rects(
+        self,
+        items: List[InvoiceItem],
+        cancel_check: Callable[[], bool] = None,
+        progress_callback: Callable[[ExportProgress], None] = None
+    ):
+        """
+        Detect auto-crop rects for all items in parallel and fill the cache
+
+        MuPDF objects are not thread-safe, so detection runs in worker
+        processes, one task per source document; placement stays serial.
+
+        Args:
+            items: List of invoice items
+            cancel_check: Optional callback to check for cancellation
+            progress_callback: Optional callback reporting detected pages
+                out of all pending pages as each document finishes; only
+                called when the worker pool is used
+        """
+        auto_rect_key = self.cropper.auto_rect_key
+        pending: Dict[str, List[int]] = {}
+        keys: Dict[Tuple[str, int], tuple] = {}
+        for item in items:
+            if item.crop_mode != "auto":
+                continue
+            key = auto_rect_key(item.path, item.page_index)
+            if key is None or key in self.auto_rect_cache:
+                continue
+            keys[(item.path, item.page_index)] = key
+            pages = pending.setdefault(item.path, [])
+            if item.page_index not in pages:
+                pages.append(item.page_index)
+
+        total_pages = sum(len(pages) for pages in pending.values())
+        if total_pages < self.parallel_min_pages:
+            return
+
+        max_workers = min(os.cpu_count() or 1, len(pending))
+        if max_workers < 2:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = {
+                pool.submit(_detect_auto_rects, path, pages, self.cropper.config): path
+                for path, pages in pending.items()
+            }
+            done_pages = 0
+            for future in as_completed(futures):
+                if cancel_check and cancel_check():
+                    for f in futures:
+                        f.cancel()
+                    return
+                path = futures[future]
+                done_pages += len(pending[path])
+                if progress_callback:
+                    progress_callback(ExportProgress(
+                        current=done_pages,
+                        total=total_pages,
+                        current_file=os.path.basename(path)
+                    ))
+                try:
+                    results = future.result()
+                except Exception:
+                    continue
+                for page_index, coords in results:
+                    self.cropper.store_auto_rect(keys[(path, page_index)], fitz.Rect(coords))
+
     def merge_to_pdf(
         self,
         items: List[InvoiceItem],
@@ -42,13 +159,53 @@ class MergeExporter:
         if not items:
             return False
 
+        # Progress spans all passes: pages detected by the worker pool (if it
+        # runs), then one step per item for resolving and one for placing
+        total_items = len(items)
+        detect_steps = 0
+
+        def report_detection(progress: ExportProgress):
+            nonlocal detect_steps
+            detect_steps = progress.total
+            progress.total += 2 * total_items
+            progress_callback(progress)
+
+        def report_step(step: int, item: InvoiceItem):
+            progress_callback(ExportProgress(
+                current=detect_steps + step,
+                total=detect_steps + 2 * total_items,
+                current_file=item.display_name
+            ))
+
         try:
+            # Pass 1: detect auto-crop rects in parallel
+            self.precompute_auto_rects(
+                items,
+                cancel_check,
+                report_detection if progress_callback else None
+            )
+
+            # Pass 2: open sources and resolve every crop rect
+            opened_docs: Dict[str, fitz.Document] = {}
+            crop_rects = self._collect_crop_rects(
+                items,
+                opened_docs,
+                cancel_check,
+                report_step if progress_callback else None
+            )
+            if crop_rects is None:
+                return False
+            dest_rects = self._batch_dest_rects(crop_rects)
+
+            # Pass 3: place content serially into the output document
             output_doc = self.engine.create_output_document()
             items_per_page = self.layout.items_per_page()
             page_width, page_height = self.layout_config.page_size
+            add_page = self.engine.add_page
+            show_pdf_page = self.engine.show_pdf_page
+            Rect = fitz.Rect
 
             current_page = None
-            opened_docs = {}
 
             for idx, item in enumerate(items):
                 # Check for cancellation
@@ -57,43 +214,23 @@ class MergeExporter:
 
                 # Report progress
                 if progress_callback:
-                    progress = ExportProgress(
-                        current=idx + 1,
-                        total=len(items),
-                        current_file=Path(item.path).name
-                    )
-                    progress_callback(progress)
+                    report_step(total_items + idx + 1, item)
 
                 # Create new page if needed
                 if idx % items_per_page == 0:
-                    current_page = self.engine.add_page(output_doc, page_width, page_height)
-
-                # Open source document (cache it)
-                if item.path not in opened_docs:
-                    try:
-                        opened_docs[item.path] = self.engine.open_document(item.path)
-                    except Exception:
-                        continue
-
-                src_doc = opened_docs[item.path]
+                    current_page = add_page(output_doc, page_width, page_height)
 
-                # Compute crop rectangle
-                try:
-                    crop_rect = self.cropper.compute_crop_rect(src_doc, item.page_index, item)
-                except Exception:
+                crop_rect = crop_rects[idx]
+                if crop_rect is None:
                     continue
 
-                # Calculate destination rectangle
-                cell_index = idx % items_per_page
-                dest_rect = self.layout.calculate_dest_rect(crop_rect, cell_index)
-
                 # Place content on page
                 try:
-                    self.engine.show_pdf_page(
+                    show_pdf_page(
                         current_page,
-                        src_doc,
+                        opened_docs[item.path],
                         item.page_index,
-                        dest_rect,
+                        Rect(*dest_rects[idx]),
                         clip=crop_rect
                     )
                 except Exception:
@@ -103,15 +240,15 @@ class MergeExporter:
             output_doc.save(output_path)
             output_doc.close()
 
-            # Close all opened documents
-            for doc in opened_docs.values():
-                doc.close()
-
             return True
 
         except Exception:
             return False
 
+        finally:
+            # Decoded resources of the placed sources are not needed any more
+            self.engine.shrink_store()
+
     def generate_preview_page(self, items: List[InvoiceItem], max_items: int = None) -> fitz.Document:
         """
         Generate a preview of the first merged page
@@ -137,44 +274,86 @@ class MergeExporter:
             page_width, page_height = self.layout_config.page_size
             current_page = self.engine.add_page(output_doc, page_width, page_height)
 
-            opened_docs = {}
+            opened_docs: Dict[str, fitz.Document] = {}
+            crop_rects = self._collect_crop_rects(preview_items, opened_docs)
+            dest_rects = self._batch_dest_rects(crop_rects)
 
             for idx, item in enumerate(preview_items):
-                # Open source document
-                if item.path not in opened_docs:
-                    try:
-                        opened_docs[item.path] = self.engine.open_document(item.path)
-                    except Exception:
-                        continue
-
-                src_doc = opened_docs[item.path]
-
-                # Compute crop rectangle
-                try:
-                    crop_rect = self.cropper.compute_crop_rect(src_doc, item.page_index, item)
-                except Exception:
+                crop_rect = crop_rects[idx]
+                if crop_rect is None:
                     continue
 
-                # Calculate destination rectangle
-                dest_rect = self.layout.calculate_dest_rect(crop_rect, idx)
-
                 # Place content on page
                 try:
                     self.engine.show_pdf_page(
                         current_page,
-                        src_doc,
+                        opened_docs[item.path],
                         item.page_index,
-                        dest_rect,
+                        fitz.Rect(*dest_rects[idx]),
                         clip=crop_rect
                     )
                 except Exception:
                     continue
 
-            # Close all opened documents
-            for doc in opened_docs.values():
-                doc.close()
-
             return output_doc
 
         except Exception:
             return None
+
+    def _collect_crop_rects(
+        self,
+        items: List[InvoiceItem],
+        opened_docs: Dict[str, fitz.Document],
+        cancel_check: Callable[[], bool] = None,
+        step_callback: Callable[[int, InvoiceItem], None] = None
+    ) -> Optional[List[Optional[fitz.Rect]]]:
+        """
+        Open source documents and compute the crop rect of every item
+
+        Args:
+            items: List of invoice items
+            opened_docs: Documents borrowed from the shared cache by path,
+                filled in place; holding one handle per path for the whole
+                call lets MuPDF reuse the page XObject for repeated placements
+            cancel_check: Optional callback to check for cancellation
+            step_callback: Optional callback(number of items done, item)
+                called after each item is resolved
+
+        Returns:
+            Crop rect per item (None where the item cannot be placed),
+            or None if cancelled
+        """
+        get_document = self.engine.get_cached_document
+        compute_crop_rect = self.cropper.compute_crop_rect
+
+        crop_rects: List[Optional[fitz.Rect]] = []
+        for idx, item in enumerate(items):
+            if cancel_check and cancel_check():
+                return None
+
+            path = item.path
+            if path not in opened_docs:
+                try:
+                    opened_docs[path] = get_document(path)
+                except Exception:
+                    opened_docs[path] = None
+            src_doc = opened_docs[path]
+
+            crop_rect = None
+            if src_doc is not None:
+                try:
+                    crop_rect = compute_crop_rect(src_doc, item.page_index, item)
+                except Exception:
+                    pass
+            crop_rects.append(crop_rect)
+            if step_callback:
+                step_callback(idx + 1, item)
+        return crop_rects
+
+    def _batch_dest_rects(self, crop_rects: List[Optional[fitz.Rect]]) -> np.ndarray:
+        """Calculate destination rects for all items in one vectorized pass"""
+        src = np.array(
+            [tuple(rect) if rect is not None else (0, 0, 0, 0) for rect in crop_rects],
+            dtype=np.float64
+        )
+        return self.layout.batch_dest_rects(src)
@@ -1,16 +1,24 @@
 """
 Data models for Invoice Merge Assistant
 """
+from __future__ import annotations
+
+import os
 from dataclasses import dataclass, field
-from typing import Literal, Optional, Tuple
-from PIL import Image
-import fitz
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Only needed for annotations; importing them here would pull PyMuPDF
+    # and Pillow into every module that uses the models
+    from PIL import Image
+    import fitz
 
 
 CropMode = Literal["auto", "top", "manual"]
 
 
-@dataclass
+@dataclass(slots=True)
 class InvoiceItem:
     """Represents a single invoice PDF file"""
     path: str
@@ -19,9 +27,13 @@ class InvoiceItem:
     manual_norm: Optional[Tuple[float, float, float, float]] = None
     cached_auto_rect: Optional[fitz.Rect] = None
     cached_thumb: Optional[Image.Image] = None
+    display_name: str = field(init=False, repr=False, compare=False)
+    cached_auto_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    cached_config_path: Optional[Path] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Validate the invoice item"""
+        self.display_name = os.path.basename(self.path)
         if self.page_index < 0:
             raise ValueError("page_index must be non-negative")
         if self.manual_norm is not None:
@@ -30,13 +42,15 @@ class InvoiceItem:
                 raise ValueError("manual_norm must be normalized coordinates in [0,1]")
 
 
-@dataclass
+@dataclass(slots=True)
 class CropConfig:
     """Configuration for cropping behavior"""
     top_half_ratio: float = 0.55
     auto_margin: float = 10.0
     pixel_threshold: int = 245
-    pixel_zoom: float = 1.5
+    pixel_zoom: float = 0.75
+    min_content_ratio: float = 0.001
+    full_page_ratio: float = 0.95
 
     def __post_init__(self):
         """Validate crop configuration"""
@@ -48,9 +62,13 @@ class CropConfig:
             raise ValueError("pixel_threshold must be in [0, 255]")
         if self.pixel_zoom <= 0:
             raise ValueError("pixel_zoom must be positive")
+        if not 0 <= self.min_content_ratio <= 1:
+            raise ValueError("min_content_ratio must be in [0, 1]")
+        if not 0 < self.full_page_ratio <= 1:
+            raise ValueError("full_page_ratio must be in (0, 1]")
 
 
-@dataclass
+@dataclass(slots=True)
 class LayoutConfig:
     """Configuration for grid layout"""
     rows: int = 2
@@ -76,7 +94,7 @@ class LayoutConfig:
             return (a4_height, a4_width)
 
 
-@dataclass
+@dataclass(slots=True)
 class ExportProgress:
     """Progress information for export task"""
     current: int = 0
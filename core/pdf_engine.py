@@ -1,6 +1,9 @@
 """
 PDF engine wrapper using PyMuPDF (fitz)
 """
+import os
+import threading
+from collections import OrderedDict
 import fitz
 from PIL import Image
 from typing import Optional, Tuple
@@ -10,6 +13,14 @@ from pathlib import Path
 class PDFEngine:
     """Wrapper for PDF operations using PyMuPDF"""
 
+    # Shared LRU of parsed source documents: path -> (mtime, document)
+    _doc_cache: "OrderedDict[str, Tuple[float, fitz.Document]]" = OrderedDict()
+    _doc_cache_lock = threading.Lock()
+    doc_cache_size: int = 16
+
+    # Colorspace shared by every thumbnail render instead of a per-call lookup
+    _CS_RGB = fitz.csRGB
+
     @staticmethod
     def open_document(path: str) -> Optional[fitz.Document]:
         """
@@ -29,6 +40,64 @@ class PDFEngine:
         except Exception as e:
             raise ValueError(f"Failed to open PDF {path}: {str(e)}")
 
+    @classmethod
+    def get_cached_document(cls, path: str) -> fitz.Document:
+        """
+        Get a shared, already-opened document from the LRU cache
+
+        The returned document is owned by the cache and must not be closed
+        by the caller. Entries are reopened when the file's mtime changes.
+        Evicted documents are dropped rather than closed, so a caller still
+        holding one keeps a valid handle until it releases it.
+
+        Args:
+            path: Path to PDF file
+
+        Returns:
+            fitz.Document
+
+        Raises:
+            ValueError: If the file cannot be opened
+        """
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            raise ValueError(f"Failed to open PDF {path}: {str(e)}")
+
+        with cls._doc_cache_lock:
+            entry = cls._doc_cache.get(path)
+            if entry is not None and entry[0] == mtime:
+                cls._doc_cache.move_to_end(path)
+                return entry[1]
+
+        doc = cls.open_document(path)
+
+        with cls._doc_cache_lock:
+            cls._doc_cache[path] = (mtime, doc)
+            cls._doc_cache.move_to_end(path)
+            while len(cls._doc_cache) > cls.doc_cache_size:
+                cls._doc_cache.popitem(last=False)
+        return doc
+
+    @classmethod
+    def clear_document_cache(cls):
+        """Drop all cached documents"""
+        with cls._doc_cache_lock:
+            cls._doc_cache.clear()
+
+    @staticmethod
+    def shrink_store(percent: int = 100):
+        """
+        Release cached MuPDF resources
+
+        MuPDF is not thread-safe, so call this from the thread that runs
+        the PDF work, not while another thread is rendering.
+
+        Args:
+            percent: Share of the store to free (100 empties it)
+        """
+        fitz.TOOLS.store_shrink(percent)
+
     @staticmethod
     def get_page_count(doc: fitz.Document) -> int:
         """Get number of pages in document"""
@@ -60,14 +129,22 @@ class PDFEngine:
         scale = min(scale_x, scale_y)
 
         mat = fitz.Matrix(scale, scale)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        pix = page.get_pixmap(matrix=mat, colorspace=PDFEngine._CS_RGB, alpha=False)
+        # Read samples through a memoryview: PIL copies the pixels once,
+        # whereas pix.samples would first copy them into a bytes object
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples_mv)
         return img
 
     @staticmethod
     def get_text_blocks(page: fitz.Page) -> list:
-        """Get all text blocks from page"""
-        return page.get_text("blocks")
+        """
+        Get all text blocks from page as (x0, y0, x1, y1, text, block_no, type)
+
+        Only clipping to the page is requested from MuPDF; ligature and
+        whitespace preservation are skipped since callers use the geometry.
+        """
+        textpage = page.get_textpage(flags=fitz.TEXT_MEDIABOX_CLIP)
+        return textpage.extractBLOCKS()
 
     @staticmethod
     def get_drawings(page: fitz.Page) -> list:
@@ -101,15 +178,22 @@ class PDFEngine:
         src_page_index: int,
         dest_rect: fitz.Rect,
         clip: Optional[fitz.Rect] = None
-    ):
+    ) -> int:
         """
         Insert source page content into destination page
 
+        Repeated placements of the same page from the same src_doc object
+        reuse one Form XObject in the output, so callers should keep one
+        open document per source path rather than reopening it.
+
         Args:
             dest_page: Destination page
             src_doc: Source document
             src_page_index: Source page index
             dest_rect: Destination rectangle
             clip: Optional clipping rectangle in source page coordinates
+
+        Returns:
+            xref of the inserted Form XObject
         """
-        dest_page.show_pdf_page(dest_rect, src_doc, src_page_index, clip=clip)
+        return dest_page.show_pdf_page(dest_rect, src_doc, src_page_index, clip=clip)
@@ -2,7 +2,7 @@
 Background task handler for non-blocking operations
 """
 import threading
-from queue import Queue
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Callable, Optional
 from .models import ExportProgress
 
@@ -12,13 +12,18 @@ class TaskRunner:
 
     def __init__(self):
         """Initialize task runner"""
-        self.current_task: Optional[threading.Thread] = None
-        self.progress_queue: Queue = Queue()
+        # One long-lived worker thread, reused by every task
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TaskRunner")
+        self.current_task: Optional[Future] = None
         self.cancel_flag = threading.Event()
 
+        # Single slot holding only the latest progress update
+        self._progress_lock = threading.Lock()
+        self._latest_progress: Optional[ExportProgress] = None
+
     def is_running(self) -> bool:
         """Check if a task is currently running"""
-        return self.current_task is not None and self.current_task.is_alive()
+        return self.current_task is not None and not self.current_task.done()
 
     def cancel(self):
         """Request cancellation of current task"""
@@ -28,32 +33,60 @@ class TaskRunner:
         """Check if cancellation was requested"""
         return self.cancel_flag.is_set()
 
-    def run_task(self, task_func: Callable, *args, **kwargs):
+    def run_task(self, task_func: Callable, *args, **kwargs) -> Future:
         """
-        Run a task in background thread
+        Run a task on the background worker thread
 
         Args:
             task_func: Function to execute
             *args, **kwargs: Arguments to pass to function
+
+        Returns:
+            Future for the task's result
         """
         if self.is_running():
             raise RuntimeError("A task is already running")
 
         self.cancel_flag.clear()
-        self.current_task = threading.Thread(
-            target=task_func,
-            args=args,
-            kwargs=kwargs,
-            daemon=True
-        )
-        self.current_task.start()
+        with self._progress_lock:
+            self._latest_progress = None
+        self.current_task = self._executor.submit(task_func, *args, **kwargs)
+        return self.current_task
+
+    def submit(self, task_func: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a short job (e.g. a preview render) on the background worker
+
+        Unlike run_task, jobs queue behind any running task and do not
+        reset the cancellation flag or become the current task.
+
+        Args:
+            task_func: Function to execute
+            *args, **kwargs: Arguments to pass to function
+
+        Returns:
+            Future for the job's result
+        """
+        return self._executor.submit(task_func, *args, **kwargs)
+
+    def shutdown(self, wait: bool = False):
+        """
+        Cancel the current task, drop queued jobs and stop the worker
+
+        Args:
+            wait: Block until the running task has returned
+        """
+        self.cancel()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
 
     def report_progress(self, progress: ExportProgress):
-        """Report progress from background task"""
-        self.progress_queue.put(progress)
+        """Report progress from background task, replacing any unread update"""
+        with self._progress_lock:
+            self._latest_progress = progress
 
     def get_progress(self) -> Optional[ExportProgress]:
-        """Get latest progress update (non-blocking)"""
-        if not self.progress_queue.empty():
-            return self.progress_queue.get_nowait()
-        return None
+        """Get latest progress update (non-blocking), or None if nothing new"""
+        with self._progress_lock:
+            progress = self._latest_progress
+            self._latest_progress = None
+        return progress
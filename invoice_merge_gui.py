@@ -1,24 +1,37 @@
 """
 发票合并助手 - 主GUI应用程序
 """
+import multiprocessing
+import os
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import replace
 from tkinter import ttk, filedialog, messagebox
-from pathlib import Path
-from typing import List, Optional
-import fitz
-from PIL import Image, ImageTk
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+# 仅导入轻量模块；fitz / PIL 导入较慢，推迟到窗口绘制之后
 from core.models import InvoiceItem, LayoutConfig, CropConfig
-from core.pdf_engine import PDFEngine
-from core.cropper import Cropper
-from core.merger import MergeExporter
 from core.tasks import TaskRunner
 from storage.persist import ConfigPersistence
 
+if TYPE_CHECKING:
+    from PIL import Image, ImageTk
+    from core.cropper import Cropper
+    from core.pdf_engine import PDFEngine
+
 
 class InvoiceMergeApp:
     """主应用程序窗口"""
 
+    PREVIEW_WIDTH = 600
+    PREVIEW_HEIGHT = 400
+    PREVIEW_CACHE_SIZE = 64
+    PREVIEW_POLL_MS = 20
+    SELECT_DEBOUNCE_MS = 50
+    EXPORT_POLL_MS = 50
+    CONFIG_FLUSH_MS = 300
+
     def __init__(self, root: tk.Tk):
         """初始化应用程序"""
         self.root = root
@@ -28,20 +41,65 @@ class InvoiceMergeApp:
         # 数据
         self.items: List[InvoiceItem] = []
         self.selected_index: Optional[int] = None
-        self.current_preview_image: Optional[ImageTk.PhotoImage] = None
+        self.current_preview_image: Optional["ImageTk.PhotoImage"] = None
         self.preview_mode: str = "single"  # "single" 或 "merged"
+        # 已渲染预览的LRU缓存: key -> PhotoImage
+        self._preview_cache: "OrderedDict[tuple, ImageTk.PhotoImage]" = OrderedDict()
+        # 后台预览渲染：递增令牌用于丢弃过期结果
+        self._render_token = 0
+        self._preview_future: Optional[Future] = None
+        self._last_preview_key: Optional[tuple] = None
+        self._prefetch_futures: Dict[tuple, Future] = {}
+        self._select_after_id: Optional[str] = None
+        # 待保存裁切配置的条目（按对象id去重），定时合并写入
+        self._dirty_items: Dict[int, InvoiceItem] = {}
+        self._flush_after_id: Optional[str] = None
+        self._pending_saves: List[tuple] = []  # (Future, 条目列表)，已提交但可能仍在排队
 
         # 配置
         self.layout_config = LayoutConfig()
         self.crop_config = CropConfig()
 
         # 组件
-        self.engine = PDFEngine()
-        self.cropper = Cropper(self.crop_config)
+        self.engine: Optional["PDFEngine"] = None
+        self.cropper: Optional["Cropper"] = None
         self.task_runner = TaskRunner()
 
         # 构建UI
         self._build_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # 先让事件循环绘制窗口，再加载依赖 fitz / PIL 的组件；
+        # update_idletasks 不处理 Expose 事件，无法保证窗口已绘制
+        self.root.after_idle(self._load_components)
+
+    def _load_components(self):
+        """加载PDF处理组件（导入 fitz / PIL 较慢）"""
+        from core.pdf_engine import PDFEngine
+        from core.cropper import Cropper
+
+        self.engine = PDFEngine()
+        self.cropper = Cropper(self.crop_config)
+
+        # 加载完成前请求的预览被跳过，此时补上
+        if self.items:
+            self._update_preview()
+
+    def _on_close(self):
+        """关闭窗口：保存未写入的配置，停止后台任务并释放缓存的文档"""
+        if self._flush_after_id is not None:
+            self.root.after_cancel(self._flush_after_id)
+        # 仍在队列中的写入会被 shutdown 取消，取消后改为在此同步写入
+        items = self._take_dirty_items()
+        for future, pending in self._pending_saves:
+            if future.cancel():
+                items.extend(pending)
+        self._save_configs(list({id(item): item for item in items}.values()))
+        # 等待工作线程结束后再释放文档，避免与其同时调用 MuPDF
+        self.task_runner.shutdown(wait=True)
+        if self.engine is not None:
+            self.engine.clear_document_cache()
+        self.root.destroy()
 
     def _build_ui(self):
         """构建用户界面"""
@@ -128,6 +186,9 @@ class InvoiceMergeApp:
         )
         self.preview_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+        # 常驻的预览图像项，更新预览时只替换其图像
+        self._preview_item = self.preview_canvas.create_image(0, 0, anchor=tk.NW)
+
         # 配置滚动条
         v_scrollbar.config(command=self.preview_canvas.yview)
         h_scrollbar.config(command=self.preview_canvas.xview)
@@ -153,7 +214,42 @@ class InvoiceMergeApp:
         ttk.Spinbox(ctrl_frame, from_=1, to=5, textvariable=self.cols_var, width=8, command=self._on_layout_change).grid(row=1, column=3, pady=(3, 0))
 
         # 导出按钮
-        ttk.Button(ctrl_frame, text="导出PDF", command=self._export_pdf).grid(row=2, column=0, columnspan=4, pady=(5, 0), sticky=(tk.W, tk.E))
+        self.export_button = ttk.Button(ctrl_frame, text="导出PDF", command=self._export_pdf)
+        self.export_button.grid(row=2, column=0, columnspan=4, pady=(5, 0), sticky=(tk.W, tk.E))
+
+        # 导出进度条
+        self.export_progress = ttk.Progressbar(ctrl_frame, mode="determinate")
+        self.export_progress.grid(row=3, column=0, columnspan=4, pady=(3, 0), sticky=(tk.W, tk.E))
+
+    def _mark_dirty(self, idx: int):
+        """标记条目的裁切配置待保存；短时间内的多次修改合并为一次写入"""
+        item = self.items[idx]
+        self._dirty_items[id(item)] = item
+        if self._flush_after_id is None:
+            self._flush_after_id = self.root.after(self.CONFIG_FLUSH_MS, self._flush_dirty)
+
+    def _take_dirty_items(self) -> List[InvoiceItem]:
+        """取出并清空待保存条目"""
+        items = list(self._dirty_items.values())
+        self._dirty_items.clear()
+        return items
+
+    def _flush_dirty(self):
+        """将待保存的配置一次性提交到后台线程写入"""
+        self._flush_after_id = None
+        items = self._take_dirty_items()
+        if items:
+            future = self.task_runner.submit(self._save_configs, items)
+            self._pending_saves = [
+                entry for entry in self._pending_saves if not entry[0].done()
+            ]
+            self._pending_saves.append((future, items))
+
+    @staticmethod
+    def _save_configs(items: List[InvoiceItem]):
+        """写入多个条目的裁切配置"""
+        for item in items:
+            ConfigPersistence.save_config(item)
 
     def _add_files(self):
         """Add PDF files to the list"""
@@ -161,10 +257,11 @@ class InvoiceMergeApp:
             title="Select PDF Files",
             filetypes=[("PDF Files", "*.pdf"), ("All Files", "*.*")]
         )
-        for file_path in files:
-            item = InvoiceItem(path=file_path)
-            self.items.append(item)
-            self.file_listbox.insert(tk.END, Path(file_path).name)
+        if not files:
+            return
+        new_items = [InvoiceItem(path=file_path) for file_path in files]
+        self.items.extend(new_items)
+        self.file_listbox.insert(tk.END, *[item.display_name for item in new_items])
 
     def _remove_file(self):
         """Remove selected file"""
@@ -180,7 +277,7 @@ class InvoiceMergeApp:
         if selection and selection[0] > 0:
             idx = selection[0]
             self.items[idx], self.items[idx-1] = self.items[idx-1], self.items[idx]
-            self._refresh_list()
+            self._swap_list_rows(idx-1)
             self.file_listbox.selection_set(idx-1)
 
     def _move_down(self):
@@ -189,24 +286,38 @@ class InvoiceMergeApp:
         if selection and selection[0] < len(self.items) - 1:
             idx = selection[0]
             self.items[idx], self.items[idx+1] = self.items[idx+1], self.items[idx]
-            self._refresh_list()
+            self._swap_list_rows(idx)
             self.file_listbox.selection_set(idx+1)
 
     def _refresh_list(self):
         """Refresh the file listbox"""
         self.file_listbox.delete(0, tk.END)
-        for item in self.items:
-            self.file_listbox.insert(tk.END, Path(item.path).name)
+        self.file_listbox.insert(tk.END, *[item.display_name for item in self.items])
+
+    def _swap_list_rows(self, idx: int):
+        """Redraw rows idx and idx+1 after their items were swapped"""
+        self.file_listbox.delete(idx, idx + 1)
+        self.file_listbox.insert(idx, self.items[idx].display_name, self.items[idx + 1].display_name)
 
     def _on_file_select(self, event):
         """Handle file selection"""
         selection = self.file_listbox.curselection()
         if selection:
             self.selected_index = selection[0]
-            self._update_preview()
+            # 防抖：快速切换选择时只渲染最后一次
+            if self._select_after_id is not None:
+                self.root.after_cancel(self._select_after_id)
+            self._select_after_id = self.root.after(self.SELECT_DEBOUNCE_MS, self._on_select_settled)
+
+    def _on_select_settled(self):
+        """选择稳定后更新预览"""
+        self._select_after_id = None
+        self._update_preview()
 
     def _update_preview(self):
         """更新预览画布"""
+        if self.engine is None:  # 组件尚未加载
+            return
         if self.preview_mode == "single":
             self._show_single_preview()
         else:
@@ -218,24 +329,55 @@ class InvoiceMergeApp:
             return
 
         item = self.items[self.selected_index]
+        key = self._single_preview_key(item)
+        self._request_preview(key, "预览失败", self._render_single, item.path, item.page_index)
+        self._prefetch_neighbors(self.selected_index)
+
+    @staticmethod
+    def _file_version(path: str) -> Optional[float]:
+        """文件修改时间，用于让重新保存过的文件的预览缓存失效"""
         try:
-            doc = self.engine.open_document(item.path)
-            page = self.engine.get_page(doc, item.page_index)
-            img = self.engine.render_thumbnail(page, 600, 400)
-            self.current_preview_image = ImageTk.PhotoImage(img)
-            self.preview_canvas.delete("all")
-            self.preview_canvas.create_image(0, 0, anchor=tk.NW, image=self.current_preview_image)
-
-            # 更新滚动区域
-            self.preview_canvas.config(scrollregion=(0, 0, img.width, img.height))
-            doc.close()
-        except Exception as e:
-            messagebox.showerror("错误", f"预览失败: {str(e)}")
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _single_preview_key(self, item: InvoiceItem) -> tuple:
+        """单页预览的缓存键"""
+        return (item.path, self._file_version(item.path), item.page_index,
+                "single", self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT)
+
+    def _prefetch_neighbors(self, idx: int):
+        """在后台预渲染相邻条目，使方向键切换时直接命中缓存"""
+        for neighbor in (idx + 1, idx - 1):
+            if not 0 <= neighbor < len(self.items):
+                continue
+            item = self.items[neighbor]
+            key = self._single_preview_key(item)
+            if key in self._preview_cache or key in self._prefetch_futures:
+                continue
+            future = self.task_runner.submit(self._render_single, item.path, item.page_index)
+            self._prefetch_futures[key] = future
+            self._poll_prefetch(future, key)
+
+    def _poll_prefetch(self, future, key: tuple):
+        """在主线程等待预渲染完成并放入缓存（不更新画布）"""
+        if not future.done():
+            self.root.after(self.PREVIEW_POLL_MS, self._poll_prefetch, future, key)
+            return
+        self._prefetch_futures.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        if key not in self._preview_cache:
+            from PIL import ImageTk
+            self._put_cached_preview(key, ImageTk.PhotoImage(future.result()))
 
     def _show_merged_preview(self):
         """显示合并预览"""
         if not self.items:
-            self.preview_canvas.delete("all")
+            self._render_token += 1
+            self._last_preview_key = None
+            self.current_preview_image = None
+            self.preview_canvas.itemconfig(self._preview_item, image="")
             self.preview_canvas.config(scrollregion=(0, 0, 0, 0))
             return
 
@@ -243,29 +385,129 @@ class InvoiceMergeApp:
             # 更新布局配置
             self.layout_config.rows = self.rows_var.get()
             self.layout_config.cols = self.cols_var.get()
+        except Exception as e:
+            messagebox.showerror("错误", f"合并预览失败: {str(e)}")
+            return
+
+        key = self._merged_preview_key()
+        self._request_preview(
+            key, "合并预览失败", self._render_merged,
+            list(self.items), replace(self.layout_config)
+        )
 
-            # 生成预览
-            exporter = MergeExporter(self.layout_config)
-            preview_doc = exporter.generate_preview_page(self.items)
+    def _request_preview(self, key: tuple, error_prefix: str, render_func, *args):
+        """
+        显示预览：命中缓存直接显示，否则在后台线程渲染
+
+        Args:
+            key: 预览缓存键
+            error_prefix: 渲染失败时的错误提示前缀
+            render_func: 在后台线程执行、返回PIL图像的渲染函数
+            *args: 传给渲染函数的参数
+        """
+        self._render_token += 1
+        # 画布上已是同一预览（如重复点击同一行），无需重建
+        if key == self._last_preview_key:
+            return
 
-            if preview_doc is None:
-                messagebox.showerror("错误", "生成预览失败")
-                return
+        photo = self._get_cached_preview(key)
+        if photo is not None:
+            self._display_preview(photo, key)
+            return
 
-            # 渲染预览
-            page = preview_doc[0]
-            pix = page.get_pixmap(matrix=fitz.Matrix(1.0, 1.0))
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            self.current_preview_image = ImageTk.PhotoImage(img)
-            self.preview_canvas.delete("all")
-            self.preview_canvas.create_image(0, 0, anchor=tk.NW, image=self.current_preview_image)
-
-            # 更新滚动区域
-            self.preview_canvas.config(scrollregion=(0, 0, img.width, img.height))
-            preview_doc.close()
+        # 尚未开始的旧渲染已无意义，直接取消
+        if self._preview_future is not None:
+            self._preview_future.cancel()
+        # 正在预渲染的条目直接等待其结果，避免重复渲染
+        future = self._prefetch_futures.get(key)
+        if future is None:
+            future = self.task_runner.submit(render_func, *args)
+        self._preview_future = future
+        self._poll_preview(future, self._render_token, key, error_prefix)
+
+    def _poll_preview(self, future, token: int, key: tuple, error_prefix: str):
+        """在主线程轮询后台渲染结果，仅显示最新一次请求的结果"""
+        if not future.done():
+            self.root.after(self.PREVIEW_POLL_MS, self._poll_preview, future, token, key, error_prefix)
+            return
+        if future.cancelled():
+            return
 
+        try:
+            img = future.result()
         except Exception as e:
-            messagebox.showerror("错误", f"合并预览失败: {str(e)}")
+            if token == self._render_token:
+                messagebox.showerror("错误", f"{error_prefix}: {str(e)}")
+            return
+
+        # PhotoImage 必须在主线程创建；过期结果仍可放入缓存
+        photo = self._preview_cache.get(key)
+        if photo is None:
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(img)
+            self._put_cached_preview(key, photo)
+        if token == self._render_token:
+            self._display_preview(photo, key)
+
+    def _render_single(self, path: str, page_index: int) -> "Image.Image":
+        """渲染单页预览图像（后台线程）"""
+        # 文档由引擎的LRU缓存持有，重复预览同一文件时无需重新解析
+        doc = self.engine.get_cached_document(path)
+        page = self.engine.get_page(doc, page_index)
+        return self.engine.render_thumbnail(page, self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT)
+
+    def _render_merged(self, items: List[InvoiceItem], layout_config: LayoutConfig) -> "Image.Image":
+        """渲染合并预览图像（后台线程）"""
+        from core.merger import MergeExporter
+
+        exporter = MergeExporter(layout_config)
+        preview_doc = exporter.generate_preview_page(items)
+        if preview_doc is None:
+            raise RuntimeError("生成预览失败")
+
+        try:
+            # 直接按画布大小渲染预览，而非全尺寸渲染
+            page = preview_doc[0]
+            return self.engine.render_thumbnail(page, self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT)
+        finally:
+            preview_doc.close()
+            # 在后台线程内释放预览占用的 MuPDF 缓存
+            self.engine.shrink_store()
+
+    def _merged_preview_key(self) -> tuple:
+        """合并预览的缓存键（预览页内的文件、裁切设置及布局）"""
+        per_page = self.layout_config.rows * self.layout_config.cols
+        items_key = tuple(
+            (item.path, self._file_version(item.path), item.page_index,
+             item.crop_mode, item.manual_norm)
+            for item in self.items[:per_page]
+        )
+        config = self.layout_config
+        return ("merged", items_key, config.rows, config.cols,
+                config.a4_orientation, config.margin, config.gap)
+
+    def _get_cached_preview(self, key: tuple) -> Optional["ImageTk.PhotoImage"]:
+        """从LRU缓存取出预览图像"""
+        photo = self._preview_cache.get(key)
+        if photo is not None:
+            self._preview_cache.move_to_end(key)
+        return photo
+
+    def _put_cached_preview(self, key: tuple, photo: "ImageTk.PhotoImage"):
+        """将预览图像放入LRU缓存，超出容量时淘汰最久未用的"""
+        self._preview_cache[key] = photo
+        self._preview_cache.move_to_end(key)
+        while len(self._preview_cache) > self.PREVIEW_CACHE_SIZE:
+            self._preview_cache.popitem(last=False)
+
+    def _display_preview(self, photo: "ImageTk.PhotoImage", key: tuple):
+        """在画布上显示预览图像"""
+        self._last_preview_key = key
+        self.current_preview_image = photo
+        self.preview_canvas.itemconfig(self._preview_item, image=photo)
+
+        # 更新滚动区域
+        self.preview_canvas.config(scrollregion=(0, 0, photo.width(), photo.height()))
 
     def _switch_preview(self, mode: str):
         """切换预览模式"""
@@ -295,10 +537,42 @@ class InvoiceMergeApp:
         self.layout_config.rows = self.rows_var.get()
         self.layout_config.cols = self.cols_var.get()
 
-        # 创建导出器并运行合并
-        exporter = MergeExporter(self.layout_config)
+        # 创建导出器并在后台线程运行合并
+        from core.merger import MergeExporter
+
+        exporter = MergeExporter(replace(self.layout_config))
+        items = list(self.items)
+        try:
+            future = self.task_runner.run_task(
+                exporter.merge_to_pdf,
+                items,
+                output_path,
+                progress_callback=self.task_runner.report_progress,
+                cancel_check=self.task_runner.is_cancelled
+            )
+        except Exception as e:
+            messagebox.showerror("错误", f"导出失败: {str(e)}")
+            return
+
+        self.export_button.state(["disabled"])
+        self.export_progress.config(value=0)
+        self._poll_export(future)
+
+    def _poll_export(self, future):
+        """在主线程轮询导出进度与结果"""
+        progress = self.task_runner.get_progress()
+        if progress is not None:
+            # 总步数包含检测、裁切计算与放置各阶段
+            self.export_progress.config(maximum=progress.total, value=progress.current)
+
+        if not future.done():
+            self.root.after(self.EXPORT_POLL_MS, self._poll_export, future)
+            return
+
+        self.export_button.state(["!disabled"])
+        self.export_progress.config(value=0)
         try:
-            success = exporter.merge_to_pdf(self.items, output_path)
+            success = future.result()
             if success:
                 messagebox.showinfo("成功", "PDF导出成功！")
             else:
@@ -309,6 +583,8 @@ class InvoiceMergeApp:
 
 def main():
     """主入口"""
+    # 打包后的程序以 spawn 方式启动检测进程时，防止子进程重新打开主窗口
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = InvoiceMergeApp(root)
     root.mainloop()
@@ -2,10 +2,45 @@
 Persistence layer for saving and loading crop configurations
 """
 import json
+import os
+import tempfile
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Optional
 from core.models import InvoiceItem
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; fall back to the standard library
+    orjson = None
+
+# Mode a plain open() would give new sidecars. os.umask can only be read by
+# setting it, so do that once at import, before any worker threads exist
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_SIDECAR_MODE = 0o666 & ~_UMASK
+
+
+def _dumps(data: Dict) -> bytes:
+    """Serialize config data to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(raw: bytes) -> Dict:
+    """Parse JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+@lru_cache(maxsize=1024)
+def _config_path(pdf_path: str) -> Path:
+    """Build the sidecar JSON path for a PDF file (memoized)"""
+    pdf_file = Path(pdf_path)
+    return pdf_file.parent / f"{pdf_file.stem}_crop_config.json"
+
 
 class ConfigPersistence:
     """Handles saving and loading crop configurations"""
@@ -13,33 +48,63 @@ class ConfigPersistence:
     @staticmethod
     def get_config_path(pdf_path: str) -> Path:
         """Get sidecar JSON path for a PDF file"""
-        pdf_file = Path(pdf_path)
-        return pdf_file.parent / f"{pdf_file.stem}_crop_config.json"
+        return _config_path(pdf_path)
 
     @staticmethod
-    def save_config(item: InvoiceItem) -> bool:
+    def save_config(item: InvoiceItem, durable: bool = False) -> bool:
         """
         Save crop configuration for an invoice item
 
         Args:
             item: Invoice item to save
+            durable: fsync the data before replacing the sidecar; sidecars
+                are cheap to recreate, so this is off by default
 
         Returns:
             True if saved successfully
         """
         try:
-            config_path = ConfigPersistence.get_config_path(item.path)
+            config_path = item.cached_config_path
+            if config_path is None:
+                config_path = ConfigPersistence.get_config_path(item.path)
+                item.cached_config_path = config_path
             config_data = {
                 "crop_mode": item.crop_mode,
                 "manual_norm": item.manual_norm,
                 "page_index": item.page_index
             }
-            with open(config_path, 'w') as f:
-                json.dump(config_data, f, indent=2)
+            # Write to a uniquely named temp file and atomically replace, so a
+            # crash mid-write never leaves a truncated sidecar behind and two
+            # writers of the same sidecar never share a temp file
+            fd, tmp_path = tempfile.mkstemp(
+                dir=config_path.parent, prefix=f"{config_path.name}.", suffix=".tmp"
+            )
+            try:
+                ConfigPersistence._write_fd(fd, _dumps(config_data), durable)
+                os.chmod(tmp_path, _SIDECAR_MODE)  # mkstemp creates files owner-only
+                os.replace(tmp_path, config_path)
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
             return True
         except Exception:
             return False
 
+    @staticmethod
+    def _write_fd(fd: int, payload: bytes, durable: bool):
+        """Write bytes to an open descriptor with raw os calls and close it"""
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
     @staticmethod
     def load_config(pdf_path: str) -> Optional[Dict]:
         """
@@ -55,7 +120,6 @@ class ConfigPersistence:
             config_path = ConfigPersistence.get_config_path(pdf_path)
             if not config_path.exists():
                 return None
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            return _loads(config_path.read_bytes())
         except Exception:
             return None